@@ -0,0 +1,2 @@
+# Root conftest: makes pytest put the repository root on sys.path so the
+# tests can import kryptobot and indicators with a bare `pytest` run.
@@ -0,0 +1,59 @@
+"""Minimal NumPy indicator kernels (RSI, MACD EMAs, ATR) used to seed kryptobot's indicator state."""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the kernels run as plain Python.
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# ----------------------- Scalar Recurrences -----------------------
+def wilder_step(prev, value, n):
+    return (prev * (n - 1) + value) / n
+
+def ema_step(prev, value, span):
+    alpha = 2.0 / (span + 1)
+    return alpha * value + (1 - alpha) * prev
+
+def true_range(high, low, prev_close):
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+def rsi_from_averages(avg_gain, avg_loss):
+    return 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+
+# ----------------------- Array Kernels -----------------------
+@njit(cache=True, fastmath=True)
+def rsi_averages(close, n=14):
+    """Wilder-smoothed average gain and loss over a close price array."""
+    deltas = close[1:] - close[:-1]
+    gains = np.maximum(deltas, 0.0)
+    losses = np.maximum(-deltas, 0.0)
+    avg_gain = gains[:n].mean()
+    avg_loss = losses[:n].mean()
+    for i in range(n, len(deltas)):
+        avg_gain = (avg_gain * (n - 1) + gains[i]) / n
+        avg_loss = (avg_loss * (n - 1) + losses[i]) / n
+    return float(avg_gain), float(avg_loss)
+
+@njit(cache=True, fastmath=True)
+def ema(x, span):
+    """EMA series of x seeded with its first value (pandas adjust=False)."""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(x)
+    out[0] = x[0]
+    for i in range(1, len(x)):
+        out[i] = alpha * x[i] + (1 - alpha) * out[i - 1]
+    return out
+
+@njit(cache=True, fastmath=True)
+def atr(high, low, close, n=14):
+    """Wilder-smoothed average true range over high/low/close arrays."""
+    high, low, prev_close = high[1:], low[1:], close[:-1]
+    ranges = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    avg = ranges[:n].mean()
+    for i in range(n, len(ranges)):
+        avg = (avg * (n - 1) + ranges[i]) / n
+    return float(avg)
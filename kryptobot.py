@@ -5,23 +5,31 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 import os
 import platform
 import time
+import numpy as np
 import pandas as pd
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
-from ta.volatility import AverageTrueRange
 import krakenex
 from pykrakenapi import KrakenAPI
 from dotenv import load_dotenv
 import logging
 from colorama import init, Fore, Style
 import yagmail
+import smtplib
 from datetime import datetime
-from contextlib import contextmanager
+from contextlib import contextmanager, suppress
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from dataclasses import dataclass, field
 import math
 import sys
 import json
 import threading
+import queue
+import itertools
 import curses
+import asyncio
+import aiohttp
+
+import indicators
 
 # Initialize colorama for non-curses logging output
 init(autoreset=True)
@@ -63,40 +71,153 @@ FULL_NAMES = {
 }
 
 # Global flags and shared data for UI and trading
-exit_flag = False
-logs = []                  # Global list to hold log messages for the UI
+exit_event = threading.Event()  # Set to request shutdown of the UI and trading threads
+LOG_HISTORY = 2000
+logs = deque(maxlen=LOG_HISTORY)  # Bounded buffer of log messages for the UI
 log_lock = threading.Lock()
 dashboard_data_lock = threading.Lock()
-latest_holdings = ""       # Holdings summary for the top pane
+latest_holdings = ()       # Holdings summary lines for the top pane
 latest_funds = 0.0         # Available funds for the top pane
+log_version = 0            # Bumped on every new log line; the UI redraws when it changes
+dash_version = 0           # Bumped when funds or holdings change
+
+# Kraken API call counters (Starter tier: max 15, decays by 0.33 per second;
+# public endpoints are throttled to roughly one call per second)
+KRAKEN_PUBLIC_MAX_COUNTER = 1
+KRAKEN_PUBLIC_DECAY = 1.0
+KRAKEN_PRIVATE_MAX_COUNTER = 15
+KRAKEN_PRIVATE_DECAY = 0.33
+
+QUERY_ORDERS_BATCH = 50    # Kraken accepts up to 50 txids per QueryOrders call
+MAX_PENDING_CHECKS = 3     # Rounds an unfilled order is re-checked before it is dropped
+
+LEDGER_SYNC_INTERVAL = 15 * 60  # Seconds between ledger reconciles against Kraken
+
+MIN_ORDER = {}             # Minimum order volume per pair code and altname
+PAIR_TO_BASE = {}          # Base asset code (as used in balances) per pair code and altname
+ASSET_PAIRS_TTL = 24 * 60 * 60
+asset_pairs_loaded_at = None
+
+KRAKEN_OHLC_URL = "https://api.kraken.com/0/public/OHLC"
+# Kraken OHLC rows are [time, open, high, low, close, vwap, volume, count]
+OHLC_WIDTH = 8
+TIME, HIGH, LOW, CLOSE = 0, 2, 3, 4
+
+# Indicator windows used by the strategy
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+SMA_SHORT = 50
+SMA_LONG = 200
 
 # ----------------------- Helper Sleep Function -----------------------
-def sleep_with_exit(total_seconds, check_interval=1):
-    """Sleep in small increments, checking for exit_flag to allow prompt shutdown."""
-    global exit_flag
-    elapsed = 0
-    while elapsed < total_seconds and not exit_flag:
-        time.sleep(check_interval)
-        elapsed += check_interval
+def sleep_with_exit(total_seconds):
+    """Sleep until total_seconds have passed or shutdown is requested, whichever is first."""
+    return exit_event.wait(total_seconds)
+
+async def async_sleep_with_exit(total_seconds):
+    """Coroutine counterpart of sleep_with_exit for use inside the trading loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, exit_event.wait, total_seconds)
+
+# ----------------------- Rate Limiting -----------------------
+class KrakenRateLimiter:
+    """Token bucket mirroring Kraken's API call counter.
+
+    Every call adds its cost to the counter, which decays at decay_per_sec.
+    A call that would push the counter past max_counter waits until enough
+    of it has decayed. Reservations are taken under a threading lock, so a
+    single limiter can be shared by coroutines and worker threads.
+    """
+    def __init__(self, max_counter, decay_per_sec):
+        self.max_counter = max_counter
+        self.decay_per_sec = decay_per_sec
+        self.counter = 0.0
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self, cost):
+        """Charge cost to the counter and return how long the caller must wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.counter = max(0.0, self.counter - (now - self.last) * self.decay_per_sec)
+            self.last = now
+            wait = max(0.0, (self.counter + cost - self.max_counter) / self.decay_per_sec)
+            self.counter += cost
+        return wait
+
+    async def acquire(self, cost=1):
+        await asyncio.sleep(self._reserve(cost))
+
+    def acquire_blocking(self, cost=1):
+        time.sleep(self._reserve(cost))
+
+public_limiter = KrakenRateLimiter(KRAKEN_PUBLIC_MAX_COUNTER, KRAKEN_PUBLIC_DECAY)
+private_limiter = KrakenRateLimiter(KRAKEN_PRIVATE_MAX_COUNTER, KRAKEN_PRIVATE_DECAY)
 
 # ----------------------- Utility Functions -----------------------
 def add_log(message):
-    """Append a timestamped log message to the global logs list."""
+    """Append a timestamped log message to the global logs buffer."""
+    global log_version
     timestamped = f"{get_timestamp()} - {message}"
     with log_lock:
         logs.append(timestamped)
+        log_version += 1
     logging.info(message)
 
+_ts_cache = (0, "")        # (epoch second, formatted timestamp) of the last call
+
 def get_timestamp():
-    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    """Return the local time as a string, formatting it at most once per second."""
+    global _ts_cache
+    now = int(time.time())
+    if _ts_cache[0] != now:
+        _ts_cache = (now, datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'))
+    return _ts_cache[1]
+
+_YAG = None                # Shared yagmail SMTP client, opened on first use
+email_queue = queue.Queue()
+EMAIL_DRAIN_TIMEOUT = 30   # Seconds to wait at shutdown for queued emails to go out
+
+def _get_yag():
+    global _YAG
+    if _YAG is None:
+        _YAG = yagmail.SMTP(user=EMAIL_USER, password=EMAIL_PASSWORD)
+    return _YAG
+
+def _deliver_email(subject, contents):
+    """Send one email over the shared SMTP connection, reconnecting once if it dropped."""
+    global _YAG
+    for attempt in range(2):
+        try:
+            _get_yag().send(to=RECIPIENT_EMAIL, subject=subject, contents=contents)
+            logging.info(f"Email sent: {subject}")
+            return
+        except (smtplib.SMTPException, OSError) as e:
+            _YAG = None
+            if attempt:
+                logging.error(f"Failed to send email: {e}")
+        except Exception as e:
+            logging.error(f"Failed to send email: {e}")
+            return
+
+def email_worker():
+    """Deliver queued notifications so the trading loop never blocks on SMTP.
+
+    Returns once it reaches the None sentinel queued at shutdown.
+    """
+    while True:
+        item = email_queue.get()
+        if item is None:
+            email_queue.task_done()
+            return
+        _deliver_email(*item)
+        email_queue.task_done()
 
 def send_email_notification(subject, contents):
-    try:
-        yag = yagmail.SMTP(user=EMAIL_USER, password=EMAIL_PASSWORD)
-        yag.send(to=RECIPIENT_EMAIL, subject=subject, contents=contents)
-        logging.info(f"Email sent: {subject}")
-    except Exception as e:
-        logging.error(f"Failed to send email: {e}")
+    email_queue.put((subject, contents))
 
 def login_kraken():
     if not api_key or not private_key:
@@ -108,44 +229,217 @@ def login_kraken():
     logging.info("Logged into Kraken successfully.")
     return kraken, kraken_api
 
+def load_asset_pairs(kraken):
+    """Fetch Kraken's tradable asset pairs once and cache per-pair order minimums and base assets."""
+    global asset_pairs_loaded_at
+    try:
+        public_limiter.acquire_blocking()
+        asset_pairs = kraken.get_tradable_asset_pairs()
+        min_order = {}
+        pair_to_base = {}
+        for pair in asset_pairs.index:
+            altname = asset_pairs.at[pair, 'altname']
+            min_order[pair] = min_order[altname] = float(asset_pairs.at[pair, 'ordermin'])
+            pair_to_base[pair] = pair_to_base[altname] = asset_pairs.at[pair, 'base']
+        MIN_ORDER.clear()
+        MIN_ORDER.update(min_order)
+        PAIR_TO_BASE.clear()
+        PAIR_TO_BASE.update(pair_to_base)
+        asset_pairs_loaded_at = time.monotonic()
+        _unresolved_pairs.clear()  # Pairs may resolve now; warn about them afresh
+        logging.info(f"Cached asset pair data for {len(asset_pairs.index)} pairs.")
+    except Exception as e:
+        logging.error(f"Error fetching tradable asset pairs: {e}")
+
+def refresh_asset_pairs(kraken):
+    """Reload AssetPairs if it has never loaded or is older than ASSET_PAIRS_TTL."""
+    if asset_pairs_loaded_at is None or time.monotonic() - asset_pairs_loaded_at > ASSET_PAIRS_TTL:
+        load_asset_pairs(kraken)
+
 def clear_screen():
     if platform.system() == 'Windows':
         os.system('cls')
     else:
         os.system('clear')
 
-def compute_indicators(ohlc):
-    close_prices = ohlc['close']
-    rsi_indicator = RSIIndicator(close=close_prices, window=14)
-    rsi_series = rsi_indicator.rsi()
-    rsi = rsi_series.iloc[-1]
-    logging.debug(f"RSI Series for latest data: {rsi_series.tail()}")
+# ----------------------- Indicator State -----------------------
+@dataclass
+class OHLC:
+    """Daily OHLC history for a pair as contiguous float64 columns, oldest bar first."""
+    time: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows):
+        arr = np.asarray(rows, dtype=np.float64).reshape(-1, OHLC_WIDTH)
+        return cls(
+            time=np.ascontiguousarray(arr[:, TIME]),
+            high=np.ascontiguousarray(arr[:, HIGH]),
+            low=np.ascontiguousarray(arr[:, LOW]),
+            close=np.ascontiguousarray(arr[:, CLOSE])
+        )
+
+@dataclass
+class IndicatorState:
+    """Running indicator values for a pair, as of its last closed daily bar."""
+    last_time: float = 0.0
+    prev_close: float = 0.0
+    rsi_avg_gain: float = 0.0
+    rsi_avg_loss: float = 0.0
+    macd_ema12: float = 0.0
+    macd_ema26: float = 0.0
+    macd_signal: float = 0.0
+    sma50_ring: deque = field(default_factory=lambda: deque(maxlen=SMA_SHORT))
+    sma200_ring: deque = field(default_factory=lambda: deque(maxlen=SMA_LONG))
+    sma50_sum: float = 0.0
+    sma200_sum: float = 0.0
+    atr_prev: float = 0.0
+
+indicator_states = {}      # Per-pair IndicatorState, keyed by trading pair code
+
+def _sma_with(ring, ring_sum, close, window):
+    """SMA over the closed bars in ring plus one provisional close."""
+    if len(ring) < window - 1:
+        return math.nan
+    oldest = ring[0] if len(ring) == window else 0.0
+    return (ring_sum - oldest + close) / window
+
+def seed_indicator_state(times, highs, lows, closes):
+    """Build an IndicatorState from float64 arrays of closed bars."""
+    if len(closes) <= max(RSI_WINDOW, ATR_WINDOW):
+        return None
+    state = IndicatorState()
+    state.rsi_avg_gain, state.rsi_avg_loss = indicators.rsi_averages(closes, RSI_WINDOW)
+    state.atr_prev = indicators.atr(highs, lows, closes, ATR_WINDOW)
+
+    ema_fast = indicators.ema(closes, MACD_FAST)
+    ema_slow = indicators.ema(closes, MACD_SLOW)
+    state.macd_ema12 = float(ema_fast[-1])
+    state.macd_ema26 = float(ema_slow[-1])
+    state.macd_signal = float(indicators.ema(ema_fast - ema_slow, MACD_SIGNAL)[-1])
+
+    state.sma50_ring.extend(closes[-SMA_SHORT:].tolist())
+    state.sma200_ring.extend(closes[-SMA_LONG:].tolist())
+    state.sma50_sum = float(closes[-SMA_SHORT:].sum())
+    state.sma200_sum = float(closes[-SMA_LONG:].sum())
+    state.prev_close = float(closes[-1])
+    state.last_time = float(times[-1])
+    return state
+
+def advance_indicator_state(state, bar_time, high, low, close):
+    """Fold one newly closed bar into the running indicator state."""
+    delta = close - state.prev_close
+    state.rsi_avg_gain = indicators.wilder_step(state.rsi_avg_gain, max(delta, 0.0), RSI_WINDOW)
+    state.rsi_avg_loss = indicators.wilder_step(state.rsi_avg_loss, max(-delta, 0.0), RSI_WINDOW)
+    state.atr_prev = indicators.wilder_step(state.atr_prev, indicators.true_range(high, low, state.prev_close), ATR_WINDOW)
+    state.macd_ema12 = indicators.ema_step(state.macd_ema12, close, MACD_FAST)
+    state.macd_ema26 = indicators.ema_step(state.macd_ema26, close, MACD_SLOW)
+    state.macd_signal = indicators.ema_step(state.macd_signal, state.macd_ema12 - state.macd_ema26, MACD_SIGNAL)
+    if len(state.sma50_ring) == SMA_SHORT:
+        state.sma50_sum -= state.sma50_ring[0]
+    state.sma50_ring.append(close)
+    state.sma50_sum += close
+    if len(state.sma200_ring) == SMA_LONG:
+        state.sma200_sum -= state.sma200_ring[0]
+    state.sma200_ring.append(close)
+    state.sma200_sum += close
+    state.prev_close = close
+    state.last_time = bar_time
+
+def update_indicator_state(pair, ohlc):
+    """Bring the cached state for pair up to date with the closed bars in ohlc.
+
+    The last bar is the still-forming daily bar, so it is never folded into
+    the state; the compute_* helpers evaluate it provisionally instead.
+    """
+    times, highs, lows, closes = ohlc.time[:-1], ohlc.high[:-1], ohlc.low[:-1], ohlc.close[:-1]
+    state = indicator_states.get(pair)
+    if state is None or not len(times) or state.last_time < times[0]:
+        state = seed_indicator_state(times, highs, lows, closes)
+        if state is None:
+            indicator_states.pop(pair, None)
+            return None
+        indicator_states[pair] = state
+        return state
+    for i in np.nonzero(times > state.last_time)[0]:
+        advance_indicator_state(state, float(times[i]), float(highs[i]), float(lows[i]), float(closes[i]))
+    return state
+
+def compute_indicators(state, ohlc):
+    close = float(ohlc.close[-1])
+    delta = close - state.prev_close
+    avg_gain = indicators.wilder_step(state.rsi_avg_gain, max(delta, 0.0), RSI_WINDOW)
+    avg_loss = indicators.wilder_step(state.rsi_avg_loss, max(-delta, 0.0), RSI_WINDOW)
+    rsi = indicators.rsi_from_averages(avg_gain, avg_loss)
+    logging.debug(f"RSI ({RSI_WINDOW}): {rsi}")
     return rsi
 
-def compute_macd_indicator(ohlc):
-    macd_indicator = MACD(close=ohlc['close'])
-    macd_diff = macd_indicator.macd_diff().iloc[-1]
-    macd_signal = macd_indicator.macd_signal().iloc[-1]
+def compute_macd_indicator(state, ohlc):
+    close = float(ohlc.close[-1])
+    ema_fast = indicators.ema_step(state.macd_ema12, close, MACD_FAST)
+    ema_slow = indicators.ema_step(state.macd_ema26, close, MACD_SLOW)
+    macd_line = ema_fast - ema_slow
+    macd_signal = indicators.ema_step(state.macd_signal, macd_line, MACD_SIGNAL)
+    macd_diff = macd_line - macd_signal
     logging.debug(f"MACD Diff: {macd_diff}, Signal: {macd_signal}")
     return macd_diff, macd_signal
 
-def compute_moving_averages(ohlc, short_window=50, long_window=200):
-    short_sma = ohlc['close'].rolling(window=short_window).mean().iloc[-1]
-    long_sma = ohlc['close'].rolling(window=long_window).mean().iloc[-1]
-    logging.debug(f"Short SMA ({short_window}): {short_sma}, Long SMA ({long_window}): {long_sma}")
+def compute_moving_averages(state, ohlc):
+    close = float(ohlc.close[-1])
+    short_sma = _sma_with(state.sma50_ring, state.sma50_sum, close, SMA_SHORT)
+    long_sma = _sma_with(state.sma200_ring, state.sma200_sum, close, SMA_LONG)
+    logging.debug(f"Short SMA ({SMA_SHORT}): {short_sma}, Long SMA ({SMA_LONG}): {long_sma}")
     return short_sma, long_sma
 
-def compute_atr(ohlc, window=14):
-    atr_indicator = AverageTrueRange(high=ohlc['high'], low=ohlc['low'], close=ohlc['close'], window=window)
-    atr = atr_indicator.average_true_range().iloc[-1]
-    logging.debug(f"ATR ({window}): {atr}")
+def compute_atr(state, ohlc):
+    true_range = indicators.true_range(float(ohlc.high[-1]), float(ohlc.low[-1]), state.prev_close)
+    atr = indicators.wilder_step(state.atr_prev, true_range, ATR_WINDOW)
+    logging.debug(f"ATR ({ATR_WINDOW}): {atr}")
     return atr
 
+def compute_trade_signals(cur, prev_close, rsi, short_sma, long_sma, atr, held):
+    """Evaluate the buy and sell rules for every scanned pair at once.
+
+    All arguments are equal-length arrays, one entry per pair. Returns
+    boolean (buy_mask, sell_mask) arrays.
+    """
+    # Dynamic thresholds based on ATR
+    buy_threshold = prev_close * (1 - 0.15 - atr / prev_close)  # 15% + ATR adjustment
+    sell_loss_threshold = prev_close * (1 - 0.07 - atr / prev_close)  # 7% + ATR
+    sell_profit_threshold = prev_close * (1 + 0.25 + atr / prev_close)  # 25% + ATR
+
+    # Trend filter: Only trade in direction of 50/200 SMA trend
+    is_uptrend = short_sma > long_sma
+
+    # Buy logic: Oversold RSI, price dip, and uptrend confirmation
+    buy_mask = (rsi < 30) & (cur <= buy_threshold) & is_uptrend
+    # Sell logic: Overbought RSI or significant price move
+    sell_mask = (held > 0) & ((rsi > 70) | (cur <= sell_loss_threshold) | (cur >= sell_profit_threshold))
+    return buy_mask, sell_mask
+
+async def fetch_ohlc(session, pair):
+    """Fetch daily OHLC data for a pair from Kraken's public endpoint."""
+    await public_limiter.acquire()
+    async with session.get(KRAKEN_OHLC_URL, params={"pair": pair, "interval": 1440}) as response:
+        return pair, await response.json()
+
+def parse_ohlc(payload):
+    """Convert a Kraken OHLC JSON payload into (canonical pair code, OHLC of float64 columns)."""
+    if payload.get('error'):
+        raise ValueError(f"Kraken error: {payload['error']}")
+    result = payload.get('result', {})
+    # Kraken keys the rows by its canonical pair code, which may differ from
+    # the code the pair was requested with (e.g. ADAZUSD -> ADAUSD).
+    canonical, rows = next(((key, value) for key, value in result.items() if key != 'last'), (None, []))
+    return canonical, OHLC.from_rows(rows)
+
 def get_account_balances(kraken):
-    sleep_with_exit(2.5)
     try:
+        private_limiter.acquire_blocking()
         balance = kraken.get_account_balance()
-        sleep_with_exit(2.5)
+        private_limiter.acquire_blocking()
         balance_tradable = kraken.get_trade_balance()
         logging.debug(f"Fetched account balances:\n{balance}")
         logging.debug(f"Fetched tradable account balances:\n{balance_tradable}")
@@ -156,15 +450,13 @@ def get_account_balances(kraken):
 
 def get_buying_power(balance, balance_tradable):
     try:
-        balance.columns = [col.lower() for col in balance.columns]
-        balance_tradable.columns = [col.lower() for col in balance_tradable.columns]
-        balance.index = [idx.upper().strip() for idx in balance.index]
-        balance_tradable.index = [idx.upper().strip() for idx in balance_tradable.index]
+        # Kraken returns upper-case asset codes and a 'vol' column, so look the
+        # scalar up directly instead of normalising both frames on every call.
         if "ZUSD" in balance_tradable.index and "vol" in balance_tradable.columns:
-            zusd_balance = float(balance_tradable.loc["ZUSD", "vol"])
+            zusd_balance = float(balance_tradable.at["ZUSD", "vol"])
             logging.debug(f"Retrieved ZUSD from tradable balance: {zusd_balance}")
         elif "ZUSD" in balance.index and "vol" in balance.columns:
-            zusd_balance = float(balance.loc["ZUSD", "vol"])
+            zusd_balance = float(balance.at["ZUSD", "vol"])
             logging.debug(f"Retrieved ZUSD from total balance: {zusd_balance}")
         else:
             logging.warning("ZUSD balance not found.")
@@ -174,17 +466,27 @@ def get_buying_power(balance, balance_tradable):
         logging.error(f"Error retrieving ZUSD balance: {e}")
         return 0.0
 
-def get_min_order_size(pair, kraken):
-    sleep_with_exit(2.5)
-    try:
-        asset_pairs = kraken.get_tradable_asset_pairs()
-        min_order = asset_pairs.loc[pair, 'lot']
-        min_order_float = float(min_order)
-        logging.debug(f"Minimum order size for {pair}: {min_order_float}")
-        return min_order_float
-    except Exception as e:
-        logging.error(f"Error fetching minimum order size for {pair}: {e}")
-        return 0.0
+_unresolved_pairs = set()  # Pairs already warned about in resolve_base
+
+def resolve_base(pair, canonical=None):
+    """Return the base asset code for pair, or None if AssetPairs does not know it.
+
+    canonical is the pair code Kraken echoed back for pair, which is tried
+    first. An unresolvable pair is warned about once rather than being read
+    as "no holdings".
+    """
+    base = PAIR_TO_BASE.get(canonical) or PAIR_TO_BASE.get(pair)
+    if base is None and pair not in _unresolved_pairs:
+        _unresolved_pairs.add(pair)
+        add_log(f"Warning: Cannot resolve base asset for {pair}; it will not be traded.")
+        logging.warning(f"No AssetPairs entry for {pair} (canonical: {canonical}).")
+    return base
+
+def get_min_order_size(pair, canonical=None):
+    """Minimum order volume for pair, or None if AssetPairs does not list it."""
+    min_order = MIN_ORDER.get(canonical, MIN_ORDER.get(pair))
+    logging.debug(f"Minimum order size for {pair}: {min_order}")
+    return min_order
 
 def place_order(kraken_api, pair, action, volume, stop_loss=None, take_profit=None):
     try:
@@ -196,6 +498,7 @@ def place_order(kraken_api, pair, action, volume, stop_loss=None, take_profit=No
             'volume': str(volume),
             'validate': False
         }
+        # AddOrder is governed by Kraken's separate trading rate limit, not the API counter.
         response = kraken_api.query_private('AddOrder', orderdata)
         if response['error']:
             logging.error(f"Order placement error for {pair}: {response['error']}")
@@ -210,15 +513,7 @@ def place_order(kraken_api, pair, action, volume, stop_loss=None, take_profit=No
                 subject=f"Kraken Bot: {action.capitalize()} Order Executed",
                 contents=f"Placed {action} order for {volume} {pair} at {get_timestamp()}.\nOrder ID: {order_id}"
             )
-            is_filled = check_order_filled(kraken_api, order_id)
-            if is_filled:
-                add_log(f"{BRIGHT_GREEN}{action.capitalize()} order filled for {volume} {pair} (Order ID: {order_id}){RESET}")
-                logging.info(f"Order {order_id} for {pair} has been filled.")
-                return True, order_id
-            else:
-                add_log(f"{YELLOW}{action.capitalize()} order for {volume} {pair} (Order ID: {order_id}) is not yet filled.{RESET}")
-                logging.warning(f"Order {order_id} for {pair} is not yet filled.")
-                return False, order_id
+            return True, order_id
         else:
             logging.error(f"No Order ID returned for {pair} {action} order.")
             return False, None
@@ -230,34 +525,133 @@ def place_order(kraken_api, pair, action, volume, stop_loss=None, take_profit=No
         )
         return False, None
 
-def check_order_filled(kraken_api, order_id):
-    try:
-        sleep_with_exit(2.5)
-        response = kraken_api.query_private('QueryOrders', {'txid': order_id})
-        if response['error']:
-            logging.error(f"Error querying order status for {order_id}: {response['error']}")
+def check_orders_filled(kraken_api, order_ids):
+    """Query several orders at once; returns {order_id: QueryOrders row}, empty if unknown."""
+    orders = {order_id: {} for order_id in order_ids}
+    for start in range(0, len(order_ids), QUERY_ORDERS_BATCH):
+        batch = order_ids[start:start + QUERY_ORDERS_BATCH]
+        try:
+            private_limiter.acquire_blocking()
+            response = kraken_api.query_private('QueryOrders', {'txid': ','.join(batch)})
+            if response['error']:
+                logging.error(f"Error querying order status for {', '.join(batch)}: {response['error']}")
+                continue
+            for order_id in batch:
+                orders[order_id] = response['result'].get(order_id, {})
+                logging.debug(f"Order {order_id} status: {orders[order_id].get('status', '')}")
+        except Exception as e:
+            logging.error(f"Failed to query order status for {', '.join(batch)}: {e}")
+    return orders
+
+def confirm_trades(kraken_api, trades):
+    """Check the given orders in one pass and return (filled, still pending) trades.
+
+    Orders that are still pending or open, or whose status could not be
+    read, are returned as pending so they can be re-checked next round,
+    up to MAX_PENDING_CHECKS times. Cancelled, expired and over-limit
+    orders are dropped; the caller's ledger reconcile settles them.
+    """
+    orders = check_orders_filled(kraken_api, [trade['OrderID'] for trade in trades])
+    confirmed, pending = [], []
+    for trade in trades:
+        action, volume, pair, order_id = trade['Type'], trade['Volume'], trade['Symbol'], trade['OrderID']
+        order = orders[order_id]
+        if order.get('status') == 'closed':
+            # Book what Kraken actually executed rather than the scan's estimate.
+            trade['Volume'] = volume = float(order['vol_exec'])
+            trade['Cost'] = float(order['cost'])
+            trade['Fee'] = float(order['fee'])
+            if volume > 0:
+                trade['Price'] = trade['Cost'] / volume
+            add_log(f"{BRIGHT_GREEN}{action} order filled for {volume} {pair} (Order ID: {order_id}){RESET}")
+            logging.info(f"Order {order_id} for {pair} has been filled.")
+            confirmed.append(trade)
+        elif order.get('status') in ('canceled', 'expired'):
+            add_log(f"{YELLOW}{action} order for {volume} {pair} (Order ID: {order_id}) was {order['status']}.{RESET}")
+            logging.warning(f"Order {order_id} for {pair} was {order['status']}.")
+        else:
+            trade['Checks'] = trade.get('Checks', 0) + 1
+            if trade['Checks'] >= MAX_PENDING_CHECKS:
+                add_log(f"{YELLOW}{action} order for {volume} {pair} (Order ID: {order_id}) still unconfirmed after {MAX_PENDING_CHECKS} checks; dropping it.{RESET}")
+                logging.warning(f"Giving up on order {order_id} for {pair} (status: {order.get('status', 'unknown')}).")
+            else:
+                add_log(f"{YELLOW}{action} order for {volume} {pair} (Order ID: {order_id}) is not yet filled; will re-check next round.{RESET}")
+                logging.warning(f"Order {order_id} for {pair} is not yet filled.")
+                pending.append(trade)
+    return confirmed, pending
+
+# ----------------------- Ledger -----------------------
+class Ledger:
+    """Local view of cash and positions, reconciled against Kraken on a schedule.
+
+    The ledger is loaded from one authoritative balance fetch, adjusted
+    locally as orders fill, and re-synced once LEDGER_SYNC_INTERVAL has
+    passed or it has been invalidated because an order outcome is unknown.
+    """
+    def __init__(self):
+        self.cash = 0.0
+        self.positions = {}        # Asset code -> volume, non-zero balances only
+        self.synced_at = None      # Cleared by invalidate() to force a reconcile
+        self.has_synced = False    # Whether cash/positions have ever been loaded
+        self.lock = threading.Lock()
+
+    def is_stale(self):
+        return self.synced_at is None or time.monotonic() - self.synced_at > LEDGER_SYNC_INTERVAL
+
+    def invalidate(self):
+        """Force a reconcile against Kraken on the next iteration."""
+        with self.lock:
+            self.synced_at = None
+
+    def sync(self, kraken):
+        """Reload cash and positions from Kraken and log any drift from the local view."""
+        balance, balance_tradable = get_account_balances(kraken)
+        if 'vol' not in balance.columns:
+            logging.warning("Ledger sync skipped: no balance data.")
             return False
-        order_info = response['result'].get(order_id, {})
-        status = order_info.get('status', '')
-        filled = (status == 'closed')
-        logging.debug(f"Order {order_id} status: {status}")
-        return filled
-    except Exception as e:
-        logging.error(f"Failed to query order status for {order_id}: {e}")
-        return False
+        cash = get_buying_power(balance, balance_tradable)
+        # Kraken lists every asset ever held; only keep the non-zero ones.
+        volumes = balance['vol'].astype(float).drop("ZUSD", errors='ignore')
+        positions = volumes[volumes > 0].to_dict()
+        with self.lock:
+            if self.has_synced:
+                if abs(cash - self.cash) > 0.01:
+                    add_log(f"Ledger drift for ZUSD: {cash - self.cash:+.2f}")
+                for asset in set(positions) | set(self.positions):
+                    delta = positions.get(asset, 0.0) - self.positions.get(asset, 0.0)
+                    if abs(delta) > 1e-8:
+                        add_log(f"Ledger drift for {asset}: {delta:+.8f}")
+            self.cash, self.positions = cash, positions
+            self.synced_at = time.monotonic()
+            self.has_synced = True
+        return True
+
+    def apply_fill(self, trade):
+        """Adjust cash and the traded asset's position for a filled order.
+
+        Uses the executed volume, cost and fee reported by QueryOrders.
+        """
+        asset = trade['Asset']
+        if trade['Type'] == 'Buy':
+            cash_delta, signed_volume = -(trade['Cost'] + trade['Fee']), trade['Volume']
+        else:
+            cash_delta, signed_volume = trade['Cost'] - trade['Fee'], -trade['Volume']
+        with self.lock:
+            self.cash += cash_delta
+            volume = self.positions.get(asset, 0.0) + signed_volume
+            if volume > 1e-8:
+                self.positions[asset] = volume
+            else:
+                self.positions.pop(asset, None)
 
-def track_holdings(kraken):
-    try:
-        balance, balance_tradable = get_account_balances(kraken)
-        holdings = {}
-        for asset in balance.index:
-            total_vol = float(balance.loc[asset, 'vol']) if 'vol' in balance.columns else 0.0
-            tradable_vol = float(balance_tradable.loc[asset, 'vol']) if (asset in balance_tradable.index and 'vol' in balance_tradable.columns) else 0.0
-            holdings[asset] = {'total': total_vol, 'tradable': tradable_vol}
-        return holdings
-    except Exception as e:
-        logging.error(f"Error tracking holdings: {e}")
-        return {}
+    def position(self, asset):
+        with self.lock:
+            return self.positions.get(asset, 0.0)
+
+def track_holdings(ledger):
+    """Holdings summary read from the local ledger (no network access)."""
+    with ledger.lock:
+        return {asset: {'total': vol, 'tradable': vol} for asset, vol in ledger.positions.items()}
 
 @contextmanager
 def handle_exceptions():
@@ -273,12 +667,21 @@ def handle_exceptions():
         sleep_with_exit(60)
 
 # ----------------------- Watchlist Helper -----------------------
+_wl_cache = {'mtime': 0, 'list': []}  # Parsed watchlist and the file mtime it came from
+
 def read_watchlist():
-    """Reads trading pair codes from watchlist.txt (one per line) and returns a list."""
+    """Reads trading pair codes from watchlist.txt (one per line) and returns a list.
+
+    The file is only re-parsed when its modification time changes.
+    """
     try:
+        st = os.stat("watchlist.txt")
+        if st.st_mtime == _wl_cache['mtime']:
+            return _wl_cache['list']
         with open("watchlist.txt", "r") as f:
             lines = f.readlines()
         watchlist = [line.strip() for line in lines if line.strip() != ""]
+        _wl_cache.update(mtime=st.st_mtime, list=watchlist)
         add_log(f"Loaded watchlist with {len(watchlist)} assets.")
         return watchlist
     except Exception as e:
@@ -287,204 +690,302 @@ def read_watchlist():
 
 # ----------------------- Dashboard Helper -----------------------
 def format_holdings(holdings):
-    """Convert holdings dictionary into a list of strings (one per holding)."""
-    parts = []
-    for asset, info in holdings.items():
-        if info['total'] > 0:
-            parts.append(f"{asset}: Total={info['total']} | Tradable={info['tradable']}")
-    return parts if parts else ["No Holdings"]
+    """Convert holdings dictionary into a tuple of strings (one per holding)."""
+    parts = tuple(f"{asset}: Total={info['total']} | Tradable={info['tradable']}" for asset, info in holdings.items())
+    return parts or ("No Holdings",)
 
 # ----------------------- Curses UI Functions -----------------------
+def create_windows(stdscr):
+    """Lay out the dashboard and log windows for the current terminal size."""
+    max_y, max_x = stdscr.getmaxyx()
+    top_height = max(7, max_y // 4)
+    bottom_height = max_y - top_height - 2
+
+    top_win = curses.newwin(top_height, max_x, 0, 0)
+    bottom_win = curses.newwin(bottom_height, max_x, top_height + 1, 0)
+    bottom_win.scrollok(True)
+    return top_win, bottom_win, top_height, bottom_height, max_x
+
 def ui_loop(stdscr):
-    global exit_flag
     curses.start_color()
     curses.curs_set(0)
-    stdscr.nodelay(True)
-    stdscr.timeout(100)
+    stdscr.timeout(250)  # getch waits up to 250 ms, which paces the loop
 
     curses.init_pair(1, curses.COLOR_CYAN, curses.COLOR_BLACK)    # Dashboard header
     curses.init_pair(2, curses.COLOR_GREEN, curses.COLOR_BLACK)   # Funds display
     curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLACK)  # Log messages
     curses.init_pair(4, curses.COLOR_WHITE, curses.COLOR_BLACK)   # Holdings list
 
-    max_y, max_x = stdscr.getmaxyx()
-    top_height = max(7, max_y // 4)
-    bottom_height = max_y - top_height - 2
-
-    top_win = curses.newwin(top_height, max_x, 0, 0)
-    bottom_win = curses.newwin(bottom_height, max_x, top_height + 1, 0)
-    bottom_win.scrollok(True)
+    top_win, bottom_win, top_height, bottom_height, max_x = create_windows(stdscr)
 
     scroll_offset = 0
+    last_log_v = last_dash_v = -1
+
+    while not exit_event.is_set():
+        redrawn = False
+
+        if dash_version != last_dash_v:
+            with dashboard_data_lock:
+                last_dash_v = dash_version
+                funds = latest_funds
+                holdings_list = latest_holdings
+            top_win.erase()
+            top_win.border()
+            top_win.addstr(1, 2, "Kraken Bot Dashboard", curses.color_pair(1) | curses.A_BOLD)
+            top_win.addstr(2, 2, f"Available Funds: ${funds:.2f}", curses.color_pair(2))
+            top_win.addstr(3, 2, "Holdings:", curses.color_pair(1) | curses.A_BOLD)
+            for idx, holding in enumerate(holdings_list):
+                if 4 + idx < top_height - 1:
+                    top_win.addstr(4 + idx, 4, holding, curses.color_pair(4))
+            top_win.noutrefresh()
+            redrawn = True
+
+        if log_version != last_log_v:
+            # Hold the lock while slicing: iterating a deque that another thread
+            # appends to raises RuntimeError.
+            with log_lock:
+                last_log_v = log_version
+                start = max(0, len(logs) - (bottom_height - 2) - scroll_offset)
+                displayable_logs = list(itertools.islice(logs, start, max(start, len(logs) - scroll_offset)))
+            bottom_win.erase()
+            bottom_win.border()
+            for idx, log_line in enumerate(displayable_logs):
+                try:
+                    bottom_win.addstr(idx+1, 2, log_line[:max_x-4], curses.color_pair(3))
+                except curses.error:
+                    pass
+            bottom_win.noutrefresh()
+            redrawn = True
 
-    while not exit_flag:
-        top_win.erase()
-        top_win.border()
-        top_win.addstr(1, 2, "Kraken Bot Dashboard", curses.color_pair(1) | curses.A_BOLD)
-        with dashboard_data_lock:
-            funds = latest_funds
-            holdings_list = latest_holdings if isinstance(latest_holdings, list) else latest_holdings.split(" | ")
-        top_win.addstr(2, 2, f"Available Funds: ${funds:.2f}", curses.color_pair(2))
-        top_win.addstr(3, 2, "Holdings:", curses.color_pair(1) | curses.A_BOLD)
-        for idx, holding in enumerate(holdings_list):
-            if 4 + idx < top_height - 1:
-                top_win.addstr(4 + idx, 4, holding, curses.color_pair(4))
-        top_win.refresh()
-
-        bottom_win.erase()
-        bottom_win.border()
-        with log_lock:
-            displayable_logs = logs[max(0, len(logs) - (bottom_height - 2 + scroll_offset)) : len(logs) - scroll_offset]
-        for idx, log_line in enumerate(displayable_logs):
-            if idx >= bottom_height - 2:
-                break
-            try:
-                bottom_win.addstr(idx+1, 2, log_line[:max_x-4], curses.color_pair(3))
-            except curses.error:
-                pass
-        bottom_win.refresh()
+        if redrawn:
+            curses.doupdate()
 
         try:
             key = stdscr.getch()
             if key == curses.KEY_UP:
                 if scroll_offset < max(0, len(logs) - (bottom_height - 2)):
                     scroll_offset += 1
+                    last_log_v = -1
             elif key == curses.KEY_DOWN:
-                scroll_offset = max(0, scroll_offset - 1)
+                if scroll_offset > 0:
+                    scroll_offset -= 1
+                    last_log_v = -1
+            elif key == curses.KEY_RESIZE:
+                curses.update_lines_cols()
+                stdscr.clear()
+                stdscr.noutrefresh()
+                top_win, bottom_win, top_height, bottom_height, max_x = create_windows(stdscr)
+                last_log_v = last_dash_v = -1
             elif key == ord('q'):
                 add_log("Q key pressed. Shutting down.")
-                exit_flag = True
+                exit_event.set()
         except Exception:
             pass
 
-        time.sleep(0.5)
-
 # ----------------------- Trading Loop -----------------------
-def trading_loop():
-    global exit_flag, latest_holdings, latest_funds
+async def trading_loop():
+    global latest_holdings, latest_funds, dash_version
     with handle_exceptions():
         kraken, kraken_api = login_kraken()
-        while not exit_flag:
-            watchlist = read_watchlist()
-            if not watchlist:
-                add_log("Watchlist is empty. Sleeping for 5 minutes.")
-                sleep_with_exit(300)
-                continue
-
-            balance, balance_tradable = get_account_balances(kraken)
-            buying_power = get_buying_power(balance, balance_tradable)
-            add_log(f"Available buying power: ${buying_power:.2f}")
-            holdings = track_holdings(kraken)
-            formatted_holdings = format_holdings(holdings)
-            add_log(f"Current Holdings: {' | '.join(formatted_holdings)}")
-
-            with dashboard_data_lock:
-                latest_funds = buying_power
-                latest_holdings = formatted_holdings
-
-            if buying_power <= 0:
-                add_log("No available buying power. Please fund your account.")
-                sleep_with_exit(300)
-                continue
+        loop = asyncio.get_running_loop()
+        # Private Kraken calls run off the event loop on a single worker, so they
+        # overlap with the OHLC scan but never race each other's nonces.
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kraken-private")
+        ledger = Ledger()
+        pending_trades = []        # Accepted orders not yet filled, re-checked each round
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            while not exit_event.is_set():
+                watchlist = read_watchlist()
+                if not watchlist:
+                    add_log("Watchlist is empty. Sleeping for 5 minutes.")
+                    await async_sleep_with_exit(300)
+                    continue
 
-            total_allocated = 0.0
-            trades = []
+                # Fetch OHLC data (daily timeframe) for every pair concurrently,
+                # while the ledger reconciles with Kraken in the background when due
+                add_log(f"Fetching market data for {len(watchlist)} assets")
+                ohlc_job = asyncio.gather(
+                    *(fetch_ohlc(session, pair) for pair in watchlist),
+                    return_exceptions=True
+                )
+                # Retried every round, so a failed AssetPairs fetch doesn't stall trading
+                await loop.run_in_executor(pool, refresh_asset_pairs, kraken)
+                if ledger.is_stale():
+                    await loop.run_in_executor(pool, ledger.sync, kraken)
+                buying_power = ledger.cash
+                add_log(f"Available buying power: ${buying_power:.2f}")
+                holdings = track_holdings(ledger)
+                formatted_holdings = format_holdings(holdings)
+                add_log(f"Current Holdings: {' | '.join(formatted_holdings)}")
+
+                with dashboard_data_lock:
+                    if (buying_power, formatted_holdings) != (latest_funds, latest_holdings):
+                        latest_funds = buying_power
+                        latest_holdings = formatted_holdings
+                        dash_version += 1
+
+                if buying_power <= 0:
+                    ohlc_job.cancel()
+                    # Retrieve the cancellation so asyncio does not report it as unhandled.
+                    with suppress(asyncio.CancelledError):
+                        await ohlc_job
+                    add_log("No available buying power. Please fund your account.")
+                    await async_sleep_with_exit(300)
+                    continue
 
-            for pair in watchlist:
-                if exit_flag:
-                    break
+                total_allocated = 0.0
+                trades = []
+                results = await ohlc_job
 
-                full_name = FULL_NAMES.get(pair, pair)
-                add_log(f"Checking {full_name}")
-                sleep_with_exit(2.5)
-                try:
-                    # Fetch OHLC data (daily timeframe)
-                    ohlc, last = kraken.get_ohlc_data(pair, interval=1440, ascending=True)
-                    if ohlc.empty or ohlc['close'].iloc[-1] == 0.0:
-                        raise ValueError("Invalid OHLC data received.")
-                    current_price = ohlc['close'].iloc[-1]
-                    previous_close = ohlc['close'].iloc[-2]
-                except Exception as e:
-                    add_log(f"Skipping {pair}: {e}")
-                    continue
+                # Per-pair inputs for the vectorized trade decision
+                pairs, canonicals, assets, cur, prev_close, rsi, short_sma, long_sma, atr, held = ([] for _ in range(10))
 
-                if not (0 < current_price < 1e10):
-                    add_log(f"Invalid price ${current_price:.2f} for {pair}. Skipping.")
-                    continue
+                for pair, result in zip(watchlist, results):
+                    if exit_event.is_set():
+                        break
 
-                # Compute indicators
-                rsi = compute_indicators(ohlc)  # RSI (14)
-                macd_diff, macd_signal = compute_macd_indicator(ohlc)  # MACD (unused here but available)
-                short_sma, long_sma = compute_moving_averages(ohlc, 50, 200)  # 50/200-day SMA
-                atr = compute_atr(ohlc, 14)  # ATR for volatility
+                    full_name = FULL_NAMES.get(pair, pair)
+                    add_log(f"Checking {full_name}")
+                    if any(trade['Symbol'] == pair for trade in pending_trades):
+                        add_log(f"Order for {pair} still pending. Skipping.")
+                        continue
+                    try:
+                        if isinstance(result, Exception):
+                            raise result
+                        canonical, ohlc = parse_ohlc(result[1])
+                        if not len(ohlc.close) or ohlc.close[-1] == 0.0:
+                            raise ValueError("Invalid OHLC data received.")
+                        current_price = float(ohlc.close[-1])
+                        previous_close = float(ohlc.close[-2])
+                    except Exception as e:
+                        add_log(f"Skipping {pair}: {e}")
+                        continue
 
-                # Dynamic thresholds based on ATR
-                buy_threshold = previous_close * (1 - 0.15 - atr / previous_close)  # 15% + ATR adjustment
-                sell_loss_threshold = previous_close * (1 - 0.07 - atr / previous_close)  # 7% + ATR
-                sell_profit_threshold = previous_close * (1 + 0.25 + atr / previous_close)  # 25% + ATR
+                    if not (0 < current_price < 1e10):
+                        add_log(f"Invalid price ${current_price:.2f} for {pair}. Skipping.")
+                        continue
 
-                # Trend filter: Only trade in direction of 50/200 SMA trend
-                is_uptrend = short_sma > long_sma
+                    # Compute indicators from the cached per-pair state
+                    state = update_indicator_state(pair, ohlc)
+                    if state is None:
+                        add_log(f"Not enough price history for {pair}. Skipping.")
+                        continue
+                    macd_diff, macd_signal = compute_macd_indicator(state, ohlc)  # MACD (unused here but available)
+                    short_avg, long_avg = compute_moving_averages(state, ohlc)  # 50/200-day SMA
 
-                # Buy logic: Oversold RSI, price dip, and uptrend confirmation
-                if rsi < 30 and current_price <= buy_threshold and is_uptrend:
+                    asset = resolve_base(pair, canonical)
+                    if asset is None:
+                        continue
+                    tradable_vol = ledger.position(asset)
+
+                    pairs.append(pair)
+                    canonicals.append(canonical)
+                    assets.append(asset)
+                    cur.append(current_price)
+                    prev_close.append(previous_close)
+                    rsi.append(compute_indicators(state, ohlc))  # RSI (14)
+                    short_sma.append(short_avg)
+                    long_sma.append(long_avg)
+                    atr.append(compute_atr(state, ohlc))  # ATR for volatility
+                    held.append(tradable_vol)
+
+                cur, atr, held = np.array(cur), np.array(atr), np.array(held)
+                buy_mask, sell_mask = compute_trade_signals(cur, np.array(prev_close), np.array(rsi), np.array(short_sma), np.array(long_sma), atr, held)
+
+                for i in np.nonzero(buy_mask)[0]:
+                    if exit_event.is_set():
+                        break
+                    pair, current_price = pairs[i], float(cur[i])
                     # Risk-adjusted position sizing (1% risk per trade)
                     risk_per_trade = buying_power * 0.01  # 1% of account
-                    stop_loss = current_price - 2 * atr
+                    stop_loss = current_price - 2 * float(atr[i])
                     if stop_loss >= current_price:  # Prevent invalid stop-loss
                         add_log(f"Invalid stop-loss for {pair}. Skipping.")
                         continue
                     position_size = risk_per_trade / (current_price - stop_loss)
                     volume = min(position_size, (buying_power * 0.20 - total_allocated) / current_price)
                     volume = round(volume, 8)
-                    min_order = get_min_order_size(pair, kraken)
+                    min_order = get_min_order_size(pair, canonicals[i])
+                    if min_order is None:
+                        add_log(f"No minimum order size known for {pair}. Skipping.")
+                        continue
                     if volume < min_order:
                         add_log(f"Volume {volume} for {pair} below min order {min_order}. Skipping.")
                         continue
-                    success, order_id = place_order(kraken_api, pair, 'buy', volume)
+                    success, order_id = await loop.run_in_executor(pool, place_order, kraken_api, pair, 'buy', volume)
                     if success:
-                        trades.append({'Type': 'Buy', 'Symbol': pair, 'Price': current_price, 'Date': datetime.now(), 'StopLoss': stop_loss})
+                        trades.append({'Type': 'Buy', 'Symbol': pair, 'Asset': assets[i], 'Price': current_price, 'Volume': volume, 'OrderID': order_id, 'Date': datetime.now(), 'StopLoss': stop_loss})
                         total_allocated += volume * current_price
-
-                # Sell logic: Overbought RSI or significant price move
-                asset_code = pair[:4]
-                tradable_vol = float(balance_tradable.loc[asset_code, 'vol']) if (asset_code in balance_tradable.index and 'vol' in balance_tradable.columns) else 0.0
-                if tradable_vol > 0 and (rsi > 70 or current_price <= sell_loss_threshold or current_price >= sell_profit_threshold):
-                    volume = round(tradable_vol, 8)
-                    success, order_id = place_order(kraken_api, pair, 'sell', volume)
+                    else:
+                        ledger.invalidate()
+
+                for i in np.nonzero(sell_mask)[0]:
+                    if exit_event.is_set():
+                        break
+                    pair, current_price = pairs[i], float(cur[i])
+                    volume = round(float(held[i]), 8)
+                    success, order_id = await loop.run_in_executor(pool, place_order, kraken_api, pair, 'sell', volume)
                     if success:
-                        trades.append({'Type': 'Sell', 'Symbol': pair, 'Price': current_price, 'Date': datetime.now()})
-
-            if trades:
-                for trade in trades:
-                    trade_type = trade['Type']
-                    trade_symbol = trade['Symbol']
-                    trade_price = trade['Price']
-                    trade_date = trade['Date'].strftime('%Y-%m-%d %H:%M:%S')
-                    if trade_type == 'Buy':
-                        add_log(f"{BRIGHT_GREEN}Buy {trade_symbol} at ${trade_price:.2f} on {trade_date} (SL: ${trade['StopLoss']:.2f}){RESET}")
-                    elif trade_type == 'Sell':
-                        add_log(f"{BRIGHT_GREEN}Sell {trade_symbol} at ${trade_price:.2f} on {trade_date}{RESET}")
-            else:
-                add_log(SEPARATOR)
-                add_log("No trades executed in this iteration.")
-
-            sleep_with_exit(300)
-
+                        trades.append({'Type': 'Sell', 'Symbol': pair, 'Asset': assets[i], 'Price': current_price, 'Volume': volume, 'OrderID': order_id, 'Date': datetime.now()})
+                    else:
+                        ledger.invalidate()
+
+                if trades or pending_trades:
+                    checked = pending_trades + trades
+                    carried = {trade['OrderID'] for trade in pending_trades}
+                    trades, pending_trades = await loop.run_in_executor(pool, confirm_trades, kraken_api, checked)
+                    for trade in trades:
+                        if trade['OrderID'] in carried:
+                            # A reconcile may already include this fill; don't count it twice.
+                            ledger.invalidate()
+                        else:
+                            ledger.apply_fill(trade)
+                    if len(trades) < len(checked):
+                        # Pending orders may still fill; reconcile rather than guess.
+                        ledger.invalidate()
+
+                if trades:
+                    for trade in trades:
+                        trade_type = trade['Type']
+                        trade_symbol = trade['Symbol']
+                        trade_price = trade['Price']
+                        trade_date = trade['Date'].strftime('%Y-%m-%d %H:%M:%S')
+                        if trade_type == 'Buy':
+                            add_log(f"{BRIGHT_GREEN}Buy {trade_symbol} at ${trade_price:.2f} on {trade_date} (SL: ${trade['StopLoss']:.2f}){RESET}")
+                        elif trade_type == 'Sell':
+                            add_log(f"{BRIGHT_GREEN}Sell {trade_symbol} at ${trade_price:.2f} on {trade_date}{RESET}")
+                for trade in pending_trades:
+                    add_log(f"{YELLOW}{trade['Type']} {trade['Symbol']} placed, pending fill (Order ID: {trade['OrderID']}){RESET}")
+                if not trades and not pending_trades:
+                    add_log(SEPARATOR)
+                    add_log("No trades executed in this iteration.")
+
+                await async_sleep_with_exit(300)
+
+        pool.shutdown()
         add_log(f"{TEAL}Script terminated gracefully.{RESET}")
         logging.info("Script terminated gracefully.")
 
 # ----------------------- Main Function -----------------------
+def run_trading_loop():
+    """Run the asynchronous trading loop on its own event loop in this thread."""
+    asyncio.run(trading_loop())
+
 def main():
-    global exit_flag
-    trading_thread = threading.Thread(target=trading_loop, daemon=True)
+    email_thread = threading.Thread(target=email_worker, daemon=True)
+    email_thread.start()
+    trading_thread = threading.Thread(target=run_trading_loop, daemon=True)
     trading_thread.start()
 
-    # Run curses UI in the main thread; this blocks until exit_flag is set.
+    # Run curses UI in the main thread; this blocks until exit_event is set.
     curses.wrapper(ui_loop)
 
-    exit_flag = True
+    exit_event.set()
     trading_thread.join()
 
+    # Flush notifications queued during the last round before exiting.
+    email_queue.put(None)
+    email_thread.join(EMAIL_DRAIN_TIMEOUT)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,34 @@
+import pandas as pd
+
+import kryptobot
+
+
+class StubKraken:
+    """Stands in for KrakenAPI, returning a fixed AssetPairs table."""
+    def get_tradable_asset_pairs(self):
+        return pd.DataFrame(
+            {
+                'altname': ['XBTUSD', 'ADAUSD'],
+                'base': ['XXBT', 'ADA'],
+                'ordermin': ['0.0001', '5'],
+            },
+            index=['XXBTZUSD', 'ADAUSD'],
+        )
+
+
+def test_pair_to_base_from_asset_pairs():
+    kryptobot.load_asset_pairs(StubKraken())
+
+    assert kryptobot.PAIR_TO_BASE['XXBTZUSD'] == 'XXBT'
+    assert kryptobot.PAIR_TO_BASE['XBTUSD'] == 'XXBT'
+    assert kryptobot.resolve_base('XXBTZUSD') == 'XXBT'
+
+    # ADAZUSD is not an AssetPairs key; Kraken answers it under ADAUSD.
+    canonical, _ = kryptobot.parse_ohlc({'error': [], 'result': {'ADAUSD': [], 'last': 0}})
+    assert kryptobot.resolve_base('ADAZUSD', canonical) == 'ADA'
+
+
+def test_unresolved_pair_is_not_read_as_no_holdings():
+    kryptobot.load_asset_pairs(StubKraken())
+
+    assert kryptobot.resolve_base('NOSUCHUSD') is None